@@ -9,23 +9,365 @@
 
 import gi
 import os
+import re
 gi.require_version('Gtk', '3.0'); gi.require_version('Gdk', '3.0')
-from gi.repository import Gtk, GLib, GdkPixbuf
+from gi.repository import Gtk, Gdk, GLib, GdkPixbuf, Gio, Pango
 import urllib.request
+import urllib.error
 import tempfile
 import subprocess
+import threading
+import queue
+import weakref
+import zipfile
+from collections import OrderedDict
 
 # for wayland
 try:
     gi.require_version('GtkLayerShell', '0.1')
     from gi.repository import GtkLayerShell
-    from gi.repository import Gdk
 except:
     pass
 
+# Optional pycairo: pages are painted by cairo at the current zoom level (and
+# Poppler renders through it); without it, pages are shown as scaled pixbufs
+try:
+    import cairo
+    CAIRO_AVAILABLE = True
+except ImportError:
+    CAIRO_AVAILABLE = False
+
+# Optional in-process PDF rendering with poppler-glib; pdftoppm/pdfinfo are
+# used when the bindings are not installed
+try:
+    gi.require_version('Poppler', '0.18')
+    from gi.repository import Poppler
+    POPPLER_AVAILABLE = True
+except Exception:
+    POPPLER_AVAILABLE = False
+
 import locale
 _ = locale.gettext
 
+_NATSORT_RE = re.compile(r'([0-9]+)')
+_PDFINFO_PAGES_RE = re.compile(r'^Pages:\s*([0-9]+)', re.MULTILINE)
+
+_IMAGE_EXTS = frozenset({'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp'})
+_TEXT_EXTS = frozenset({'.txt', '.log', '.md', '.conf', '.cfg', '.ini', '.json', '.xml', '.yaml', '.yml'})
+
+# Images are decoded at most at this factor of the screen size, which leaves
+# room to zoom in without keeping a huge full-resolution bitmap around
+_PRESCALE_HEADROOM = 2.0
+_READ_CHUNK_SIZE = 65536
+_HEADER_SIZE = 16  # Bytes looked at to detect the file type from its content
+_PDF_DPI = 120  # 120 DPI is good enough
+# Text files are loaded in chunks (in characters), up to a maximum size
+_TEXT_CHUNK_SIZE = 262144
+_TEXT_MAX_SIZE = 20 * 1024 * 1024
+# Number of rendered PDF pages kept around (current page + read-ahead)
+_PAGE_CACHE_SIZE = 4
+# Page filtering: cheap while the zoom is changing, smooth once it settles
+_ZOOM_SETTLE_MS = 150
+# On X11, how long after mapping to wait for the fullscreen state before the
+# viewer is considered ready anyway (some window managers ignore fullscreen)
+_FULLSCREEN_WAIT_MS = 1000
+# URL downloads: timeout per socket operation (connect, then each read) and
+# number of attempts for transient network errors
+_DOWNLOAD_TIMEOUT = 15
+_DOWNLOAD_ATTEMPTS = 3
+
+# Page renders and URL downloads run on the viewer's own workers rather than
+# on the shared refresh pool: renders of a document are serialized by its lock
+# anyway, a download can take up to a minute, and refresh ticks and button
+# actions must not queue up behind them
+_VIEWER_WORKER_COUNT = 2
+_viewer_queue = queue.Queue()
+_viewer_workers_started = False
+
+def _viewer_worker_loop():
+    while True:
+        fn = _viewer_queue.get()
+        try:
+            fn()
+        except Exception as e:
+            print(f"Document viewer worker error: {e}")
+
+def _run_on_viewer_worker(fn):
+    """Run fn() on one of the viewer workers (started on first use). Must be
+    called from the main thread; fn marshals UI work back via GLib.idle_add."""
+    global _viewer_workers_started
+    if not _viewer_workers_started:
+        _viewer_workers_started = True
+        for _i in range(_VIEWER_WORKER_COUNT):
+            threading.Thread(target=_viewer_worker_loop, daemon=True).start()
+    _viewer_queue.put(fn)
+
+def _natural_sort_key(name):
+    """Sort key so that 'page2' comes before 'page10'"""
+    return [int(text) if text.isdigit() else text.lower() for text in _NATSORT_RE.split(name)]
+
+def _pick_filter(scale):
+    """cairo filter for drawing a page at the given scale: nearest pixel when
+    it is close to 1:1, a real downscaling filter for strong reductions"""
+    if 0.9 <= scale <= 1.1:
+        return cairo.FILTER_FAST
+    if scale < 0.5:
+        return cairo.FILTER_GOOD
+    return cairo.FILTER_BILINEAR
+
+def _stream_chunks(f, chunk_size=_READ_CHUNK_SIZE):
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+def _read_chunks(path, chunk_size=_READ_CHUNK_SIZE):
+    with open(path, 'rb') as f:
+        yield from _stream_chunks(f, chunk_size)
+
+def _looks_like_text(header):
+    """Binary check on the first bytes of a file: no NUL byte and valid UTF-8,
+    tolerating a multi-byte character cut at the end of the header"""
+    if b'\x00' in header:
+        return False
+    try:
+        header.decode('utf-8')
+    except UnicodeDecodeError as e:
+        return e.reason == 'unexpected end of data' and e.start >= len(header) - 3
+    return True
+
+# Magic numbers of the supported formats, checked in order
+_MAGIC = (
+    (b'%PDF', 'pdf'),
+    (b'PK\x03\x04', 'cbz'),  # ZIP
+    (b'PK\x05\x06', 'cbz'),  # empty ZIP
+    (b'\x89PNG', 'image'),
+    (b'\xff\xd8\xff', 'image'),  # JPEG
+    (b'GIF87a', 'image'),
+    (b'GIF89a', 'image'),
+    (b'BM', 'image'),  # BMP
+)
+
+def _detect_type(header):
+    """Guess the document kind from the first bytes of a file (magic numbers):
+    'pdf', 'cbz', 'image', 'text' or None"""
+    for prefix, kind in _MAGIC:
+        if header.startswith(prefix):
+            return kind
+    if header[8:12] == b'WEBP' and header.startswith(b'RIFF'):
+        return 'image'
+    # Try to detect if it's text (UTF-8 or ASCII)
+    if _looks_like_text(header):
+        return 'text'
+    return None
+
+def _download(url, cancel):
+    """Download url into a temporary file. Returns its path and the first
+    bytes of the content, for type detection without re-reading the file.
+    Network errors and 5xx answers are retried with an exponential backoff.
+    Setting the cancel event stops the download at the next chunk (or
+    retry) and raises RuntimeError."""
+    suffix = os.path.splitext(url.split('?')[0])[1]  # Remove query params
+    if not suffix:
+        suffix = ".tmp"  # Use temp extension, will detect from content
+    for attempt in range(_DOWNLOAD_ATTEMPTS):
+        if cancel.is_set():
+            raise RuntimeError("cancelled")
+        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
+        try:
+            with temp_file, urllib.request.urlopen(url, timeout=_DOWNLOAD_TIMEOUT) as response:
+                header = response.read(_HEADER_SIZE)
+                temp_file.write(header)
+                # Copy in chunks rather than holding the whole file in memory
+                for chunk in _stream_chunks(response):
+                    if cancel.is_set():
+                        raise RuntimeError("cancelled")
+                    temp_file.write(chunk)
+            return temp_file.name, header
+        except OSError as e:
+            _remove_file(temp_file.name)
+            if isinstance(e, urllib.error.HTTPError) and e.code < 500:
+                raise
+            if attempt == _DOWNLOAD_ATTEMPTS - 1:
+                raise
+            print(f"Error downloading file (attempt {attempt + 1}): {e}")
+            cancel.wait(0.5 * 2 ** attempt)
+        except BaseException:
+            _remove_file(temp_file.name)
+            raise
+
+def _remove_file(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+def _load_pixbuf(chunks, max_width=0, max_height=0, mime_type=None):
+    """Decode an image from an iterable of byte chunks. When max_width and
+    max_height are set, the decoder is asked to shrink the image to fit them
+    (libjpeg then downscales during decode); it is never enlarged. A known
+    mime_type skips the format detection."""
+    if mime_type:
+        loader = GdkPixbuf.PixbufLoader.new_with_mime_type(mime_type)
+    else:
+        loader = GdkPixbuf.PixbufLoader()
+    if max_width > 0 and max_height > 0:
+        def on_size_prepared(loader, width, height):
+            scale = min(max_width / width, max_height / height)
+            if scale < 1.0:
+                loader.set_size(max(1, int(width * scale)), max(1, int(height * scale)))
+        loader.connect("size-prepared", on_size_prepared)
+    try:
+        for chunk in chunks:
+            loader.write(chunk)
+        loader.close()
+    except Exception:
+        try:
+            loader.close()
+        except Exception:
+            pass
+        raise
+    return loader.get_pixbuf()
+
+def _render_pdf_page(path, page_num, cancellable=None, max_size=0):
+    """Rasterize one PDF page with pdftoppm and return it as a pixbuf. With
+    max_size, the longest side of the page is rendered at max_size pixels
+    instead of at _PDF_DPI. Safe to call from a worker thread; cancelling
+    kills pdftoppm."""
+    if max_size > 0:
+        size_args = ['-scale-to', str(max_size)]
+    else:
+        size_args = ['-r', str(_PDF_DPI)]
+    cmd = [
+        'pdftoppm',
+        '-jpeg',
+        *size_args,
+        '-f', str(page_num), # First page
+        '-l', str(page_num), # Last page
+        path
+    ]
+
+    if cancellable is not None and cancellable.is_cancelled():
+        raise RuntimeError("cancelled")
+    # stderr is discarded: a damaged PDF can make pdftoppm write more errors
+    # than a pipe holds, and it would then block before finishing stdout
+    proc = Gio.Subprocess.new(cmd, Gio.SubprocessFlags.STDOUT_PIPE | Gio.SubprocessFlags.STDERR_SILENCE)
+    stdout = proc.get_stdout_pipe()
+
+    # Decode the JPEG while pdftoppm is still writing it
+    def read_stdout():
+        while True:
+            chunk = stdout.read_bytes(_READ_CHUNK_SIZE, cancellable).get_data()
+            if not chunk:
+                break
+            yield chunk
+
+    try:
+        pixbuf = _load_pixbuf(read_stdout(), mime_type='image/jpeg')
+        proc.wait(cancellable)
+    except GLib.Error as e:
+        proc.force_exit()
+        if cancellable is not None and cancellable.is_cancelled():
+            raise
+        proc.wait(None)
+        err = e.message
+    else:
+        if proc.get_successful() and pixbuf is not None:
+            return pixbuf
+        err = "no page rendered"
+    # A failed pdftoppm explains a broken image better than the decoder does
+    if proc.get_if_exited() and proc.get_exit_status() != 0:
+        err = f"exit status {proc.get_exit_status()}"
+    raise RuntimeError(f"pdftoppm error: {err}")
+
+def _render_poppler_page(document, page_num, max_width=0, max_height=0):
+    """Rasterize one page of an already opened Poppler document, directly at
+    the size that fits max_width x max_height (at _PDF_DPI when unbounded).
+    Poppler documents are not thread-safe: callers must serialize access."""
+    page = document.get_page(page_num - 1)
+    width, height = page.get_size()  # in points (1/72 inch)
+    if max_width > 0 and max_height > 0:
+        scale = min(max_width / width, max_height / height)
+    else:
+        scale = _PDF_DPI / 72.0
+    surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, max(1, int(width * scale)), max(1, int(height * scale)))
+    cr = cairo.Context(surface)
+    cr.set_source_rgb(1, 1, 1)  # pages are transparent, paint the paper
+    cr.paint()
+    cr.scale(scale, scale)
+    page.render(cr)
+    surface.flush()
+    return Gdk.pixbuf_get_from_surface(surface, 0, 0, surface.get_width(), surface.get_height())
+
+class _PageLoader:
+    """Render document pages on the viewer workers and keep the most
+    recent ones in a small LRU cache. Must be used from the GTK main thread;
+    only render_fn(page_num) -> pixbuf runs on a worker."""
+
+    def __init__(self, render_fn, is_closed, max_pages=_PAGE_CACHE_SIZE):
+        self._render_fn = render_fn
+        self._is_closed = is_closed
+        self._pages = OrderedDict()
+        self._pending = {}  # page_num -> callbacks waiting for that page
+        self._max_pages = max_pages
+        self._focus = None  # page on screen, read by the workers
+
+    def focus(self, page_num):
+        """Set the page being displayed. Queued renders of pages that are no
+        longer next to it are dropped, so holding a direction doesn't pile up
+        renders of every page that was skipped over."""
+        self._focus = page_num
+
+    def load(self, page_num, callback=None):
+        """Get page_num rendered, then call callback(page_num, pixbuf) on the
+        main thread (pixbuf is None if rendering failed). Without a callback
+        the page is only pre-rendered into the cache."""
+        pixbuf = self._pages.get(page_num)
+        if pixbuf is not None:
+            self._pages.move_to_end(page_num)
+            if callback is not None:
+                callback(page_num, pixbuf)
+            return
+        waiting = self._pending.get(page_num)
+        if waiting is not None:
+            # already being rendered (typically by a read-ahead)
+            if callback is not None:
+                waiting.append(callback)
+            return
+        self._pending[page_num] = [callback] if callback is not None else []
+
+        def work():
+            # Nothing to render once the viewer is closed, or for a page no
+            # longer next to the one on screen
+            focus = self._focus
+            if self._is_closed() or (focus is not None and abs(page_num - focus) > 1):
+                GLib.idle_add(self._on_loaded, page_num, None)
+                return
+            try:
+                pixbuf = self._render_fn(page_num)
+            except Exception as e:
+                if not self._is_closed():
+                    print(f"Error rendering page {page_num}: {e}")
+                pixbuf = None
+            GLib.idle_add(self._on_loaded, page_num, pixbuf)
+
+        _run_on_viewer_worker(work)
+
+    def _on_loaded(self, page_num, pixbuf):
+        callbacks = self._pending.pop(page_num, [])
+        if self._is_closed():
+            self._pages.clear()
+            return False
+        if pixbuf is not None:
+            self._pages[page_num] = pixbuf
+            self._pages.move_to_end(page_num)
+            while len(self._pages) > self._max_pages:
+                self._pages.popitem(last=False)
+        for callback in callbacks:
+            callback(page_num, pixbuf)
+        return False
+
 class DocViewer:
 
     def __init__(self, is_wayland):
@@ -39,111 +381,174 @@ class DocViewer:
     def open(self, parent_window, file_path: str, f_on_destroy, f_on_quit):
         """Open a fullscreen document viewer window (PDF, images, CBZ, or plain text)"""
 
-        # Download file if it's a URL
-        local_path = file_path
-        temp_files = []  # Track temp files for cleanup
+        if not file_path.startswith(("http://", "https://")):
+            self._show(parent_window, file_path, None, None, f_on_destroy, f_on_quit)
+            return
+
+        # Download on a worker so that the main loop keeps running meanwhile;
+        # a placeholder is shown (B/Escape/Cancel abort the download) and the
+        # viewer is built once the file is on disk
+        cancel = threading.Event()
+
+        def cancel_download(*_):
+            if not cancel.is_set():
+                cancel.set()
+                self._handle_gamepad_action = None
+                loading.destroy()
+                f_on_destroy()
+            return False
 
-        if file_path.startswith(("http://", "https://")):
+        def on_downloaded(local_path, header):
+            if cancel.is_set():
+                # Closed by the user meanwhile
+                if local_path is not None:
+                    _remove_file(local_path)
+                return False
+            cancel.set()
+            self._handle_gamepad_action = None
             try:
-                with urllib.request.urlopen(file_path, timeout=10) as response:
-                    # Try to get extension from URL
-                    suffix = os.path.splitext(file_path.split('?')[0])[1]  # Remove query params
-                    if not suffix:
-                        suffix = ".tmp"  # Use temp extension, will detect from content
-                    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
-                    temp_file.write(response.read())
-                    temp_file.close()
-                    local_path = temp_file.name
-                    temp_files.append(local_path)
-            except Exception as e:
-                print(f"Error downloading file: {e}")
-                return
-
-        # Check if it's a PDF, CBZ, image, or text file based on file extension
-        lower_path = local_path.lower()
-        is_pdf = lower_path.endswith('.pdf')
-        is_cbz = lower_path.endswith('.cbz')
-        is_image = any(lower_path.endswith(ext) for ext in ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp'])
-        is_text = any(lower_path.endswith(ext) for ext in [
-            '.txt', '.log', '.md', '.conf', '.cfg', '.ini', '.json', '.xml', '.yaml', '.yml'
-        ])
+                if local_path is None:
+                    f_on_destroy()
+                    return False
+                try:
+                    self._show(parent_window, local_path, local_path, header, f_on_destroy, f_on_quit)
+                except Exception as e:
+                    # No viewer to remove the download with
+                    print(f"Error opening downloaded file: {e}")
+                    _remove_file(local_path)
+                    f_on_destroy()
+            finally:
+                loading.destroy()
+            return False
 
-        # If we can't determine from extension, try to detect from content (magic numbers)
-        if not is_pdf and not is_cbz and not is_image and not is_text:
+        def download():
             try:
-                with open(local_path, 'rb') as f:
-                    header = f.read(16)  # Read more bytes for better detection
-                    print(f"Detecting file type from content, first 8 bytes: {header[:8]}")
-                    # Check for PDF magic number
-                    if header.startswith(b'%PDF'):
-                        is_pdf = True
-                    # Check for ZIP/CBZ magic number (PK)
-                    elif header.startswith(b'PK\x03\x04') or header.startswith(b'PK\x05\x06'):
-                        is_cbz = True
-                    # Check for common image formats
-                    elif header.startswith(b'\x89PNG'):
-                        is_image = True
-                    elif header.startswith(b'\xff\xd8\xff'):  # JPEG
-                        is_image = True
-                    elif header.startswith(b'GIF87a') or header.startswith(b'GIF89a'):
-                        is_image = True
-                    elif header.startswith(b'BM'):  # BMP
-                        is_image = True
-                    elif len(header) >= 12 and header.startswith(b'RIFF') and header[8:12] == b'WEBP':
-                        is_image = True
-                    else:
-                        # Try to detect if it's text (UTF-8 or ASCII)
-                        try:
-                            header.decode('utf-8')
-                            is_text = True
-                        except Exception:
-                            pass
+                local_path, header = _download(file_path, cancel)
             except Exception as e:
-                print(f"Error detecting file type: {e}")
+                if not cancel.is_set():
+                    print(f"Error downloading file: {e}")
+                local_path, header = None, None
+            GLib.idle_add(on_downloaded, local_path, header)
 
-        # Create fullscreen window
-        viewer = Gtk.Window()
+        loading = self._show_loading(parent_window, cancel_download)
+        _run_on_viewer_worker(download)
+
+    def _create_window(self, parent_window):
+        """Fullscreen modal window over parent_window (a layer-shell overlay on wayland)"""
+        window = Gtk.Window()
 
         if self._is_wayland:
-            GtkLayerShell.init_for_window(viewer)
-            GtkLayerShell.set_layer(viewer, GtkLayerShell.Layer.OVERLAY)
-            GtkLayerShell.set_keyboard_interactivity(viewer, False)
+            GtkLayerShell.init_for_window(window)
+            GtkLayerShell.set_layer(window, GtkLayerShell.Layer.OVERLAY)
+            GtkLayerShell.set_keyboard_interactivity(window, False)
             # screen
             display = Gdk.Display.get_default()
             monitor = display.get_monitor(0)  # on batocera, 0 is the main screen, and 1 is the backglass
-            GtkLayerShell.set_monitor(viewer, monitor)
+            GtkLayerShell.set_monitor(window, monitor)
             # screen size on wayland
-            GtkLayerShell.set_anchor(viewer, GtkLayerShell.Edge.TOP, True)
-            GtkLayerShell.set_anchor(viewer, GtkLayerShell.Edge.BOTTOM, True)
-            GtkLayerShell.set_anchor(viewer, GtkLayerShell.Edge.LEFT, True)
-            GtkLayerShell.set_anchor(viewer, GtkLayerShell.Edge.RIGHT, True)
+            GtkLayerShell.set_anchor(window, GtkLayerShell.Edge.TOP, True)
+            GtkLayerShell.set_anchor(window, GtkLayerShell.Edge.BOTTOM, True)
+            GtkLayerShell.set_anchor(window, GtkLayerShell.Edge.LEFT, True)
+            GtkLayerShell.set_anchor(window, GtkLayerShell.Edge.RIGHT, True)
         else:
-            viewer.set_decorated(False)
-            viewer.fullscreen()
+            window.set_decorated(False)
+            window.fullscreen()
+
+        window.set_modal(True)
+        window.set_transient_for(parent_window)
+        window.get_style_context().add_class("popup-root")
+        return window
+
+    def _show_loading(self, parent_window, on_cancel):
+        """Placeholder shown while a document is downloaded. on_cancel is
+        called for B on the gamepad, Escape, or the Cancel button."""
+        loading = self._create_window(parent_window)
+
+        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=20)
+        box.set_halign(Gtk.Align.CENTER)
+        box.set_valign(Gtk.Align.CENTER)
+        loading.add(box)
+
+        spinner = Gtk.Spinner()
+        spinner.set_size_request(48, 48)
+        spinner.start()
+        box.pack_start(spinner, False, False, 0)
+        box.pack_start(Gtk.Label(label=_("Downloading...")), False, False, 0)
+
+        cancel_btn = Gtk.Button.new_with_label(_("Cancel"))
+        cancel_btn.get_style_context().add_class("cc-button")
+        cancel_btn.connect("clicked", on_cancel)
+        box.pack_start(cancel_btn, False, False, 0)
 
-        viewer.set_modal(True)
-        viewer.set_transient_for(parent_window)
-        viewer.get_style_context().add_class("popup-root")
+        def on_key_press(widget, event):
+            if event.keyval == 65307:  # ESC key
+                on_cancel()
+                return True
+            return False
+
+        loading.connect("key-press-event", on_key_press)
+
+        def loading_gamepad_handler(action: str):
+            if action == "back":
+                on_cancel()
+
+        self._handle_gamepad_action = loading_gamepad_handler
+        loading.show_all()
+        return loading
+
+    def _show(self, parent_window, local_path, temp_path, header, f_on_destroy, f_on_quit):
+        """Build the viewer window for a local file. temp_path is removed with
+        the viewer; header holds the first bytes of the file when already known."""
+
+        # Check if it's a PDF, CBZ, image, or text file based on file extension
+        ext = os.path.splitext(local_path)[1].lower()
+        is_pdf = ext == '.pdf'
+        is_cbz = ext == '.cbz'
+        is_image = ext in _IMAGE_EXTS
+        is_text = ext in _TEXT_EXTS
+
+        # If we can't determine from extension, try to detect from content (magic numbers)
+        if not is_pdf and not is_cbz and not is_image and not is_text:
+            try:
+                if header is None:
+                    with open(local_path, 'rb') as f:
+                        header = f.read(_HEADER_SIZE)
+                print(f"Detecting file type from content, first 8 bytes: {header[:8]}")
+                kind = _detect_type(header)
+                is_pdf = kind == 'pdf'
+                is_cbz = kind == 'cbz'
+                is_image = kind == 'image'
+                is_text = kind == 'text'
+            except Exception as e:
+                print(f"Error detecting file type: {e}")
+
+        # Create fullscreen window
+        viewer = self._create_window(parent_window)
+        # Also runs at interpreter exit, if the window is never destroyed
+        remove_temp_file = weakref.finalize(viewer, _remove_file, temp_path) if temp_path else None
 
         # Track if viewer is fully initialized (to ignore initial focus-out during fullscreen transition)
         viewer_initialized = [False]
 
         # Close everything if viewer loses focus to external app
-        def on_viewer_focus_out(*_):
-            # Ignore focus-out during initial setup
-            if not viewer_initialized[0]:
-                return False
+        focus_check_pending = [False]
+
+        # Don't quit if we're just switching to the close button or other UI elements
+        def check_and_close():
+            focus_check_pending[0] = False
+            # Only quit if the viewer window is completely inactive and not just switching focus internally
+            if not viewer.is_active() and not viewer.has_focus():
+                # Additional check: make sure we're not just focusing on a child widget
+                focused_widget = viewer.get_focus()
+                if focused_widget is None:
+                    f_on_quit()
+            return False
 
-            # Don't quit if we're just switching to the close button or other UI elements
-            def check_and_close():
-                # Only quit if the viewer window is completely inactive and not just switching focus internally
-                if not viewer.is_active() and not viewer.has_focus():
-                    # Additional check: make sure we're not just focusing on a child widget
-                    focused_widget = viewer.get_focus()
-                    if focused_widget is None:
-                        f_on_quit()
+        def on_viewer_focus_out(*_):
+            # Ignore focus-out during initial setup, and while a check is already scheduled
+            if not viewer_initialized[0] or focus_check_pending[0]:
                 return False
-
+            focus_check_pending[0] = True
             GLib.timeout_add(500, check_and_close)  # Increased delay to 500ms for better stability
             return False
 
@@ -159,8 +564,28 @@ class DocViewer:
 
         viewer.connect("key-press-event", on_key_press)
 
-        # Mark viewer as initialized after fullscreen transition completes
-        GLib.timeout_add(1000, lambda: (viewer_initialized.__setitem__(0, True), False)[1])
+        # Mark viewer as initialized once the fullscreen transition completes
+        # (layer-shell surfaces have no fullscreen state: once they are mapped)
+        def on_window_state(widget, event):
+            if event.new_window_state & Gdk.WindowState.FULLSCREEN:
+                viewer_initialized[0] = True
+            return False
+
+        def mark_initialized():
+            viewer_initialized[0] = True
+            return False
+
+        def on_map(*_):
+            if self._is_wayland:
+                viewer_initialized[0] = True
+            else:
+                # Fallback for window managers that never report fullscreen
+                GLib.timeout_add(_FULLSCREEN_WAIT_MS, mark_initialized)
+            return False
+
+        viewer.connect("map-event", on_map)
+        if not self._is_wayland:
+            viewer.connect("window-state-event", on_window_state)
 
         main_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=0)
         viewer.add(main_box)
@@ -170,7 +595,11 @@ class DocViewer:
         scrolled.set_policy(Gtk.PolicyType.AUTOMATIC, Gtk.PolicyType.AUTOMATIC)
         main_box.pack_start(scrolled, True, True, 0)
 
-        img = Gtk.Image()
+        # Images and PDF/CBZ pages are painted by cairo at the current zoom
+        # level: zooming only resizes the widget and repaints the visible area,
+        # no scaled copy of the page is allocated. Without pycairo, a scaled
+        # copy is shown in a Gtk.Image instead
+        img = Gtk.DrawingArea() if CAIRO_AVAILABLE else Gtk.Image()
         img.set_halign(Gtk.Align.CENTER)
         img.set_valign(Gtk.Align.CENTER)
 
@@ -185,41 +614,106 @@ class DocViewer:
         text_view.set_top_margin(20)
         text_view.set_bottom_margin(20)
 
+        # Images and comic pages are decoded straight to (a bit more than) the
+        # screen size instead of their full resolution, which can be huge
+        prescale_width = prescale_height = 0
+        screen = viewer.get_screen()
+        if screen:
+            prescale_width = int(screen.get_width() * _PRESCALE_HEADROOM)
+            prescale_height = int(screen.get_height() * _PRESCALE_HEADROOM)
+
+        # Set when the window is gone, so late background results are dropped
+        viewer_closed = [False]
+        # Cancelled on close, to stop pdftoppm processes that are still running
+        render_cancellable = Gio.Cancellable()
+        # CBZ archive handles, one per viewer worker (keyed by thread id) since
+        # ZipFile is not safe to read from several threads at once. Closed
+        # with the viewer
+        cbz_files = {}
+        cbz_lock = threading.Lock()
+
         # Zoom functionality
         zoom_level = [1.0]  # Current zoom level (1.0 = 100%)
         original_pixbuf = [None]  # Store original pixbuf for images/PDFs/CBZ
         original_font_size = [14]  # Store original font size for text
+        text_font_desc = Pango.FontDescription()  # Shared by all text zoom levels
+        text_font_desc.set_family("monospace")
         border_size = [0]
+        # cairo copy of the displayed page as (pixbuf, surface), made on its
+        # first draw and reused by every redraw (zoom, scroll) of that page
+        source_surface = [None, None]
+        zooming = [False]  # Zoom still changing: draw with cairo.FILTER_FAST
+        zoom_settle_timer = [0]
+
+        def set_page_pixbuf(pixbuf):
+            original_pixbuf[0] = pixbuf
+
+        def draw_page(widget, cr):
+            pixbuf = original_pixbuf[0]
+            if pixbuf is None:
+                return False
+            if source_surface[0] is not pixbuf:
+                # Only the current page's copy is kept: the page cache already
+                # holds the recent pixbufs
+                source_surface[:] = [pixbuf, Gdk.cairo_surface_create_from_pixbuf(pixbuf, 1, None)]
+            surface = source_surface[1]
+            scale_x = widget.get_allocated_width() / pixbuf.get_width()
+            scale_y = widget.get_allocated_height() / pixbuf.get_height()
+            cr.scale(scale_x, scale_y)
+            cr.set_source_surface(surface, 0, 0)
+            cr.get_source().set_filter(cairo.FILTER_FAST if zooming[0] else _pick_filter(min(scale_x, scale_y)))
+            cr.paint()
+            return False
+
+        if CAIRO_AVAILABLE:
+            img.connect("draw", draw_page)
 
         def apply_initial_zoom():
             if original_pixbuf[0]:
-                zoom_level[0] = get_initial_zoom(original_pixbuf[0], viewer)
+                zoom_level[0] = get_initial_zoom(original_pixbuf[0])
                 apply_zoom()
 
-        def get_initial_zoom(pixbuf, viewer):
-            if not pixbuf or viewer is None:
-                return 1.0
+        # Space available for the page, looked up once the window has a real size
+        fit_size = [None]
+
+        def get_fit_size():
+            if fit_size[0] is not None:
+                return fit_size[0]
 
             # Try logical window size first
             alloc = viewer.get_allocation()
             avail_w = alloc.width
             avail_h = alloc.height
+            realized = avail_w > 1 and avail_h > 1
 
             # If not realized yet, fall back to screen
-            if avail_w <= 1 or avail_h <= 1:
+            if not realized:
                 screen = viewer.get_screen()
-                if screen:
-                    avail_w = screen.get_width()
-                    avail_h = screen.get_height()
-                else:
-                    return 1.0
+                if not screen:
+                    return None
+                avail_w = screen.get_width()
+                avail_h = screen.get_height()
 
             # Leave room for bottom buttons
-            avail_h -= border_size[0]
-            if avail_h <= 0:
-                avail_h = 1
-            zoomX = avail_w / pixbuf.get_width()
-            zoomY = avail_h / pixbuf.get_height()
+            size = (avail_w, max(1, avail_h - border_size[0]))
+            if realized:
+                fit_size[0] = size
+            return size
+
+        def on_configure(widget, event):
+            # Only a real resize makes the cached fit size stale
+            if fit_size[0] is not None and (event.width, max(1, event.height - border_size[0])) != fit_size[0]:
+                fit_size[0] = None
+            return False
+
+        viewer.connect("configure-event", on_configure)
+
+        def get_initial_zoom(pixbuf):
+            size = get_fit_size()
+            if not pixbuf or size is None:
+                return 1.0
+            zoomX = size[0] / pixbuf.get_width()
+            zoomY = size[1] / pixbuf.get_height()
 
             # Fit both dimensions, allow upscaling
             return min(zoomX, zoomY)
@@ -231,50 +725,81 @@ class DocViewer:
                 orig_height = original_pixbuf[0].get_height()
                 new_width = int(orig_width * zoom_level[0])
                 new_height = int(orig_height * zoom_level[0])
-                scaled_pixbuf = original_pixbuf[0].scale_simple(
-                    new_width, new_height, GdkPixbuf.InterpType.BILINEAR
-                )
-                img.set_from_pixbuf(scaled_pixbuf)
+                if CAIRO_AVAILABLE:
+                    img.set_size_request(max(1, new_width), max(1, new_height))
+                    img.queue_draw()
+                else:
+                    img.set_from_pixbuf(original_pixbuf[0].scale_simple(
+                        max(1, new_width), max(1, new_height), GdkPixbuf.InterpType.BILINEAR))
             elif is_text:
                 # Zoom text by changing font size
                 new_font_size = max(6, int(original_font_size[0] * zoom_level[0]))  # Minimum 6pt font
-                from gi.repository import Pango
-                font_desc = Pango.FontDescription()
-                font_desc.set_family("monospace")
-                font_desc.set_size(new_font_size * Pango.SCALE)  # Pangp.SCALE is the correct multiplier
-                text_view.override_font(font_desc)
+                text_font_desc.set_size(new_font_size * Pango.SCALE)  # Pango.SCALE is the correct multiplier
+                text_view.override_font(text_font_desc)
+
+        # Gamepad zoom/pan actions only record what changed; a single idle
+        # callback then applies everything that arrived within the same frame
+        view_update_pending = [False]
+        zoom_changed = [False]
+        pan_delta = [0, 0]  # Accumulated (dx, dy) since the last update
+
+        def settle_zoom():
+            zoom_settle_timer[0] = 0
+            if not viewer_closed[0]:
+                zooming[0] = False
+                img.queue_draw()
+            return False
+
+        def flush_view_update():
+            view_update_pending[0] = False
+            if zoom_changed[0]:
+                zoom_changed[0] = False
+                zooming[0] = True
+                if zoom_settle_timer[0]:
+                    GLib.source_remove(zoom_settle_timer[0])
+                zoom_settle_timer[0] = GLib.timeout_add(_ZOOM_SETTLE_MS, settle_zoom)
+                apply_zoom()
+            dx, dy = pan_delta
+            pan_delta[0] = pan_delta[1] = 0
+            for adj, delta in ((scrolled.get_hadjustment(), dx), (scrolled.get_vadjustment(), dy)):
+                if delta:
+                    new_value = min(max(adj.get_value() + delta, adj.get_lower()),
+                                    adj.get_upper() - adj.get_page_size())
+                    adj.set_value(new_value)
+            return False
+
+        def schedule_view_update():
+            if not view_update_pending[0]:
+                view_update_pending[0] = True
+                GLib.idle_add(flush_view_update)
 
         def zoom_in():
             """Increase zoom level"""
             zoom_level[0] = min(zoom_level[0] * 1.2, 5.0)  # Max 500% zoom
-            apply_zoom()
+            zoom_changed[0] = True
+            schedule_view_update()
 
         def zoom_out():
             """Decrease zoom level"""
             zoom_level[0] = max(zoom_level[0] / 1.2, 0.2)  # Min 20% zoom
-            apply_zoom()
+            zoom_changed[0] = True
+            schedule_view_update()
 
         # Panning functionality for right analog stick
         def pan_content(direction):
             """Pan the scrolled content in the specified direction"""
-            h_adj = scrolled.get_hadjustment()
-            v_adj = scrolled.get_vadjustment()
-
             # Pan step size (adjust as needed)
             pan_step = 50
 
             if direction == "pan_up":
-                new_value = max(v_adj.get_value() - pan_step, v_adj.get_lower())
-                v_adj.set_value(new_value)
+                pan_delta[1] -= pan_step
             elif direction == "pan_down":
-                new_value = min(v_adj.get_value() + pan_step, v_adj.get_upper() - v_adj.get_page_size())
-                v_adj.set_value(new_value)
+                pan_delta[1] += pan_step
             elif direction == "pan_left":
-                new_value = max(h_adj.get_value() - pan_step, h_adj.get_lower())
-                h_adj.set_value(new_value)
+                pan_delta[0] -= pan_step
             elif direction == "pan_right":
-                new_value = min(h_adj.get_value() + pan_step, h_adj.get_upper() - h_adj.get_page_size())
-                h_adj.set_value(new_value)
+                pan_delta[0] += pan_step
+            schedule_view_update()
 
         # Define close function early so it can be used by all handlers
         def close_viewer(*_):
@@ -285,12 +810,11 @@ class DocViewer:
         # === IMAGE ===
         if is_image:
             try:
-                pixbuf = GdkPixbuf.Pixbuf.new_from_file(local_path)
+                pixbuf = _load_pixbuf(_read_chunks(local_path), prescale_width, prescale_height)
 
                 # Store original pixbuf for zooming
-                original_pixbuf[0] = pixbuf
+                set_page_pixbuf(pixbuf)
 
-                img.set_from_pixbuf(pixbuf)
                 scrolled.add(img)
 
                 button_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
@@ -326,68 +850,71 @@ class DocViewer:
         # === PDF ===
         elif is_pdf:
             try:
-                from gi.repository import Gio
-
                 scrolled.add(img)
 
-                result = subprocess.run(['pdfinfo', local_path], capture_output=True, text=True)
-                page_count = 1
-                for line in result.stdout.split('\n'):
-                    if line.startswith('Pages:'):
-                        try:
-                            page_count = int(line.split(':')[1].strip())
-                        except Exception:
-                            pass
-                        break
+                # Keep the parsed document in memory with Poppler, instead of
+                # forking pdftoppm (which re-parses the file) for every page
+                document = None
+                if POPPLER_AVAILABLE and CAIRO_AVAILABLE:
+                    try:
+                        uri = GLib.filename_to_uri(os.path.abspath(local_path), None)
+                        document = Poppler.Document.new_from_file(uri, None)
+                    except Exception as e:
+                        print(f"Poppler could not open the PDF, using pdftoppm: {e}")
+
+                if document is not None:
+                    page_count = document.get_n_pages()
+                    document_lock = threading.Lock()
+
+                    def rasterize_page(page_num):
+                        with document_lock:
+                            return _render_poppler_page(document, page_num, prescale_width, prescale_height)
+                else:
+                    result = subprocess.run(['pdfinfo', local_path], capture_output=True, text=True)
+                    match = _PDFINFO_PAGES_RE.search(result.stdout)
+                    page_count = int(match.group(1)) if match else 1
+
+                    def rasterize_page(page_num):
+                        # The longest side at the smallest prescale bound always fits the box
+                        return _render_pdf_page(local_path, page_num, render_cancellable,
+                                                min(prescale_width, prescale_height))
 
                 current_page = [1]
                 first_page_rendered = [False]
 
-                def render_page(page_num):
-                    if 1 <= page_num <= page_count:
-                        try:
-                            cmd = [
-                                'pdftoppm',
-                                '-jpeg',
-                                '-r', '120',         # 120 DPI is good enough
-                                '-f', str(page_num), # First page
-                                '-l', str(page_num), # Last page
-                                local_path
-                            ]
-
-                            proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-
-                            if proc.returncode != 0:
-                                print(f"pdftoppm error: {proc.stderr.decode('utf-8', errors='ignore')}")
-                                return
-
-                            img_data = proc.stdout
-                            if not img_data or len(img_data) < 50:
-                                print(f"Error: No data received for page {page_num}")
-                                return
+                # Pages are rendered by a background worker, with read-ahead of
+                # the adjacent ones so that Next/Previous are usually instant
+                page_loader = _PageLoader(rasterize_page, lambda: viewer_closed[0])
 
-                            stream = Gio.MemoryInputStream.new_from_data(img_data, None)
-                            pixbuf = GdkPixbuf.Pixbuf.new_from_stream(stream, None)
-                            stream.close()
+                def show_page(page_num, pixbuf):
+                    # Ignore pages that were skipped over while rendering
+                    if pixbuf is None or page_num != current_page[0]:
+                        return
 
-                            original_pixbuf[0] = pixbuf
+                    set_page_pixbuf(pixbuf)
 
-                            # Only compute initial zoom once, for the first rendered page
-                            if not first_page_rendered[0]:
-                                zoom_level[0] = get_initial_zoom(original_pixbuf[0], viewer)
-                                first_page_rendered[0] = True
+                    # Only compute initial zoom once, for the first rendered page
+                    if not first_page_rendered[0]:
+                        zoom_level[0] = get_initial_zoom(original_pixbuf[0])
+                        first_page_rendered[0] = True
 
-                            apply_zoom()
+                    apply_zoom()
 
-                            current_page[0] = page_num
+                def render_page(page_num):
+                    if 1 <= page_num <= page_count:
+                        current_page[0] = page_num
 
-                            if page_count > 1:
-                                prev_btn.set_sensitive(page_num > 1)
-                                next_btn.set_sensitive(page_num < page_count)
-                                page_label.set_text(f"{page_num} / {page_count}")
+                        if page_count > 1:
+                            prev_btn.set_sensitive(page_num > 1)
+                            next_btn.set_sensitive(page_num < page_count)
+                            page_label.set_text(f"{page_num} / {page_count}")
 
-                        except Exception as e:
-                            print(f"Error rendering page {page_num}: {e}")
+                        page_loader.focus(page_num)
+                        page_loader.load(page_num, show_page)
+                        # Read ahead in the reading direction first
+                        for adjacent in (page_num + 1, page_num - 1):
+                            if 1 <= adjacent <= page_count:
+                                page_loader.load(adjacent)
 
                 button_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
                 button_box.set_halign(Gtk.Align.CENTER)
@@ -446,59 +973,74 @@ class DocViewer:
         # === CBZ ===
         elif is_cbz:
             try:
-                import zipfile
-                from gi.repository import Gio
-                import re
-
                 scrolled.add(img)
 
-                cbz_file = zipfile.ZipFile(local_path, 'r')
-
-                image_extensions = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp')
-                all_files = cbz_file.namelist()
-                image_files = [f for f in all_files if f.lower().endswith(image_extensions)]
+                # Keep the ZipInfo entries so pages are read without a name lookup
+                with zipfile.ZipFile(local_path, 'r') as cbz_file:
+                    image_infos = [i for i in cbz_file.infolist()
+                                   if os.path.splitext(i.filename)[1].lower() in _IMAGE_EXTS]
+                image_infos.sort(key=lambda i: _natural_sort_key(i.filename))
 
-                def natural_sort_key(s):
-                    return [int(text) if text.isdigit() else text.lower()
-                            for text in re.split('([0-9]+)', s)]
-
-                image_files.sort(key=natural_sort_key)
-
-                if not image_files:
+                if not image_infos:
                     raise Exception("No images found in CBZ file")
 
-                page_count = len(image_files)
+                page_count = len(image_infos)
                 current_page = [0]
-                first_page_rendered = [False]
+                # Comic pages often differ in size (e.g. double spreads): each page
+                # is fitted on first display, then keeps the zoom it was left at
+                page_zoom = {}
+                shown_page = [None]
+
+                def decode_page(page_num):
+                    # Each worker reads through its own handle, so pages are
+                    # inflated and decoded in parallel without a lock, and the
+                    # entry is streamed to the loader instead of read whole
+                    worker = threading.get_ident()
+                    with cbz_lock:
+                        if viewer_closed[0]:
+                            return None
+                        zf = cbz_files.get(worker)
+                        if zf is None:
+                            zf = cbz_files[worker] = zipfile.ZipFile(local_path, 'r')
+                    with zf.open(image_infos[page_num]) as member:
+                        return _load_pixbuf(_stream_chunks(member),
+                                            prescale_width, prescale_height)
+
+                # Pages are decoded by a background worker, with read-ahead of
+                # the adjacent ones so that Next/Previous are usually instant
+                page_loader = _PageLoader(decode_page, lambda: viewer_closed[0])
+
+                def show_page(page_num, pixbuf):
+                    # Ignore pages that were skipped over while decoding
+                    if pixbuf is None or page_num != current_page[0]:
+                        return
+
+                    set_page_pixbuf(pixbuf)
+
+                    if page_num not in page_zoom:
+                        page_zoom[page_num] = get_initial_zoom(original_pixbuf[0])
+                    zoom_level[0] = page_zoom[page_num]
+                    shown_page[0] = page_num
+
+                    apply_zoom()
 
                 def render_page(page_num):
                     if 0 <= page_num < page_count:
-                        try:
-                            file_name = image_files[page_num]
-                            img_data = cbz_file.read(file_name)
-
-                            stream = Gio.MemoryInputStream.new_from_data(img_data, None)
-                            pixbuf = GdkPixbuf.Pixbuf.new_from_stream(stream, None)
-                            stream.close()
-
-                            original_pixbuf[0] = pixbuf
-
-                            # Only compute initial zoom once, on first rendered page
-                            if not first_page_rendered[0]:
-                                zoom_level[0] = get_initial_zoom(original_pixbuf[0], viewer)
-                                first_page_rendered[0] = True
-
-                            apply_zoom()
-
-                            current_page[0] = page_num
-
-                            if page_count > 1:
-                                prev_btn.set_sensitive(page_num > 0)
-                                next_btn.set_sensitive(page_num < page_count - 1)
-                                page_label.set_text(f"{page_num + 1} / {page_count}")
-
-                        except Exception as e:
-                            print(f"Error rendering page {page_num + 1}: {e}")
+                        if shown_page[0] is not None:
+                            page_zoom[shown_page[0]] = zoom_level[0]
+                        current_page[0] = page_num
+
+                        if page_count > 1:
+                            prev_btn.set_sensitive(page_num > 0)
+                            next_btn.set_sensitive(page_num < page_count - 1)
+                            page_label.set_text(f"{page_num + 1} / {page_count}")
+
+                        page_loader.focus(page_num)
+                        page_loader.load(page_num, show_page)
+                        # Read ahead in the reading direction first
+                        for adjacent in (page_num + 1, page_num - 1):
+                            if 0 <= adjacent < page_count:
+                                page_loader.load(adjacent)
 
                 button_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
                 button_box.set_halign(Gtk.Align.CENTER)
@@ -546,14 +1088,6 @@ class DocViewer:
 
                 self._handle_gamepad_action = cbz_gamepad_handler
 
-                def clean_up_zip(*_):
-                    try:
-                        cbz_file.close()
-                    except Exception:
-                        pass
-
-                viewer.connect("destroy", clean_up_zip)
-
             except Exception as e:
                 print(f"Error loading CBZ: {e}")
                 error_label = Gtk.Label(label=f"Error loading CBZ: {e}")
@@ -562,19 +1096,31 @@ class DocViewer:
 
         # === TEXT ===
         elif is_text:
+            text_file = None
             try:
-                with open(local_path, 'r', encoding='utf-8', errors='replace') as f:
-                    content = f.read()
-
+                # Show the first chunk right away and append the rest from idle
+                # callbacks, so big logs neither block the UI nor sit in memory twice
+                text_file = open(local_path, 'r', encoding='utf-8', errors='replace', buffering=_TEXT_CHUNK_SIZE)
+                # Set the font first, so the text is not laid out twice
+                original_font_size[0] = 14
+                text_font_desc.set_size(original_font_size[0] * Pango.SCALE)
+                text_view.override_font(text_font_desc)
                 text_buffer = text_view.get_buffer()
-                text_buffer.set_text(content)
+                text_loaded = [0]
+
+                def append_text_chunk():
+                    chunk = "" if viewer_closed[0] or text_file.closed else text_file.read(_TEXT_CHUNK_SIZE)
+                    if chunk:
+                        text_buffer.insert(text_buffer.get_end_iter(), chunk)
+                        text_loaded[0] += len(chunk)
+                        if text_loaded[0] < _TEXT_MAX_SIZE:
+                            return True
+                        text_buffer.insert(text_buffer.get_end_iter(), "\n\n[" + _("File truncated") + "]")
+                    text_file.close()
+                    return False
 
-                from gi.repository import Pango
-                font_desc = Pango.FontDescription()
-                font_desc.set_family("monospace")
-                font_desc.set_size(14 * Pango.SCALE)
-                text_view.override_font(font_desc)
-                original_font_size[0] = 14
+                if append_text_chunk():
+                    GLib.idle_add(append_text_chunk)
 
                 scrolled.add(text_view)
 
@@ -604,6 +1150,8 @@ class DocViewer:
                 self._handle_gamepad_action = text_gamepad_handler
 
             except Exception as e:
+                if text_file is not None:
+                    text_file.close()
                 print(f"Error loading text file: {e}")
                 error_label = Gtk.Label(label=f"Error loading text file: {e}")
                 error_label.set_line_wrap(True)
@@ -617,15 +1165,22 @@ class DocViewer:
             main_box.pack_start(error_label, True, True, 20)
 
         def on_destroy(*_):
-            import shutil
-            for temp_file in temp_files:
-                try:
-                    if os.path.isdir(temp_file):
-                        shutil.rmtree(temp_file)
-                    elif os.path.exists(temp_file):
-                        os.unlink(temp_file)
-                except Exception:
-                    pass
+            viewer_closed[0] = True
+            render_cancellable.cancel()
+            # The handlers keep this scope alive until the window is collected:
+            # let go of the decoded pages now
+            original_pixbuf[0] = None
+            source_surface[:] = [None, None]
+            # A page still being streamed keeps its file open until it is done
+            with cbz_lock:
+                for zf in cbz_files.values():
+                    try:
+                        zf.close()
+                    except Exception:
+                        pass
+                cbz_files.clear()
+            if remove_temp_file:
+                remove_temp_file()
             f_on_destroy()
 
         # Only images get a one-shot global initial zoom; PDFs/CBZ do it per-page
@@ -22,13 +22,8 @@ if script_dir not in sys.path:
 
 os.environ.setdefault("NO_AT_BRIDGE", "1")
 
-import gi
-gi.require_version('Gtk', '3.0')
-gi.require_version('Gdk', '3.0')
-from gi.repository import Gtk
-
-from xml_utils import parse_xml, validate_xml
-from ui_core import ControlCenterApp
+# gi, Gtk and the UI modules are only imported by main() once the arguments
+# are parsed and a display is found, so --help and early errors stay fast
 from log import debug_print, DEBUG
 
 import locale
@@ -37,12 +32,41 @@ def ensure_display():
     return bool(os.environ.get("WAYLAND_DISPLAY") or os.environ.get("DISPLAY"))
 
 def gtk_init_check():
+    from gi.repository import Gtk
     try:
         ok, _ = Gtk.init_check(sys.argv)
         return bool(ok)
     except Exception:
         return False
 
+# Directories searched for the XML and CSS files, before the script directory
+CONFIG_DIRS = ("/userdata/system/configs/controlcenter", "/usr/share/batocera/controlcenter")
+
+# directory -> set of its entries, read once and shared by the find_file() calls
+_dir_entries = {}
+
+def _list_dir(directory):
+    entries = _dir_entries.get(directory)
+    if entries is None:
+        try:
+            entries = set(os.listdir(directory))
+        except OSError:
+            entries = set()
+        _dir_entries[directory] = entries
+    return entries
+
+def find_file(filename):
+    """Find file in priority order:
+    1. /userdata/system/configs/controlcenter/
+    2. /usr/share/batocera/controlcenter/
+    3. Same directory as controlcenter.py
+    """
+    for directory in CONFIG_DIRS:
+        if filename in _list_dir(directory):
+            return os.path.join(directory, filename)
+    # Return the script directory path even if it doesn't exist (for error messages)
+    return os.path.join(script_dir, filename)
+
 def main():
     import argparse
     
@@ -54,12 +78,47 @@ def main():
     parser.add_argument('--fullscreen', action='store_true', help='Run in fullscreen mode')
     parser.add_argument('--window', metavar='WIDTHxHEIGHT', help='Set window size (e.g., 640x480)')
     parser.add_argument('--hidden', action='store_true', help='Start hidden')
-    parser.add_argument('timeout', nargs='?', type=int, default=0, help='Auto-close timeout in seconds')
-    parser.add_argument('xml_file', nargs='?', help='XML configuration file')
-    parser.add_argument('css_file', nargs='?', help='CSS style file')
+    parser.add_argument('params', nargs='*', metavar='timeout|xml_file|css_file',
+                        help='Auto-close timeout in seconds, .xml configuration file, .css style file (in any order)')
     
     args = parser.parse_args()
 
+    # Positional parameters: a bare integer is the timeout, a .xml file the
+    # configuration and a .css file the style, each at most once
+    xml_path = None
+    css_path = None
+    auto_close_seconds = None
+    for param in args.params:
+        suffix = os.path.splitext(param)[1].lower()
+        if param.isdecimal():
+            if auto_close_seconds is not None:
+                parser.error(f"timeout given twice: {param}")
+            auto_close_seconds = int(param)
+        elif suffix == '.xml':
+            if xml_path is not None:
+                parser.error(f"XML file given twice: {param}")
+            xml_path = param
+        elif suffix == '.css':
+            if css_path is not None:
+                parser.error(f"CSS file given twice: {param}")
+            css_path = param
+        else:
+            parser.error(f"unrecognized argument: {param} (expected a timeout, a .xml or a .css file)")
+    if auto_close_seconds is None:
+        auto_close_seconds = 0
+
+    if not ensure_display():
+        sys.stderr.write("ERROR: No GUI display detected. Set DISPLAY or WAYLAND_DISPLAY.\n")
+        sys.exit(1)
+
+    import gi
+    gi.require_version('Gtk', '3.0')
+    gi.require_version('Gdk', '3.0')
+    from gi.repository import Gtk
+
+    from xml_utils import parse_xml, validate_xml
+    from ui_core import ControlCenterApp
+
     # Will be set after app is created
     app_instance = [None]
 
@@ -90,37 +149,10 @@ def main():
     signal.signal(signal.SIGTERM, signal_handler)
     signal.signal(signal.SIGUSR1, signal_handler_usr1)
 
-    if not ensure_display():
-        sys.stderr.write("ERROR: No GUI display detected. Set DISPLAY or WAYLAND_DISPLAY.\n")
-        sys.exit(1)
     if not gtk_init_check():
         sys.stderr.write("ERROR: Gtk couldn't be initialized.\n")
         sys.exit(1)
 
-    # Helper function to find files in priority order
-    def find_file(filename, default_path):
-        """Find file in priority order:
-        1. /userdata/system/configs/controlcenter/
-        2. /usr/share/batocera/controlcenter/
-        3. Same directory as controlcenter.py (default_path)
-        """
-        search_paths = [
-            f"/userdata/system/configs/controlcenter/{filename}",
-            f"/usr/share/batocera/controlcenter/{filename}",
-            default_path
-        ]
-
-        for path in search_paths:
-            if os.path.exists(path):
-                return path
-
-        # Return default path even if it doesn't exist (for error messages)
-        return default_path
-
-    # Get script directory for default paths (follow symlinks)
-    script_path = os.path.realpath(__file__)
-    script_dir = os.path.dirname(script_path)
-
     # Parse window size if provided
     window_size = None
     if args.window:
@@ -137,19 +169,15 @@ def main():
             sys.stderr.write(f"ERROR: Invalid window size format: {args.window}. Use WIDTHxHEIGHT (e.g., 640x480).\n")
             sys.exit(1)
 
-    # Determine file paths
-    xml_path = args.xml_file
-    css_path = args.css_file
-    auto_close_seconds = args.timeout
     hidden_at_startup = args.hidden
 
     # If no XML path specified, search in priority order
     if xml_path is None:
-        xml_path = find_file("controlcenter.xml", os.path.join(script_dir, "controlcenter.xml"))
+        xml_path = find_file("controlcenter.xml")
 
     # If no CSS path specified, search in priority order
     if css_path is None:
-        css_path = find_file("style.css", os.path.join(script_dir, "style.css"))
+        css_path = find_file("style.css")
 
     if not os.path.exists(xml_path):
         sys.stderr.write(f"ERROR: XML file not found: {xml_path}\n")
@@ -8,47 +8,101 @@
 #
 # YOU MUST KEEP THIS HEADER AS IT IS
 
-import time
+import os
+import functools
+import struct
+from array import array
 import pyudev
 from evdev import InputDevice, ecodes
-import re
 from pathlib import Path
 import xml.etree.ElementTree as ET
 import threading
 from log import debug_print, DEBUG
+from refresh import Debouncer
 
 from gi.repository import GLib
 
+# Event constants used on every event, bound once
+_EV_KEY = ecodes.EV_KEY
+_EV_ABS = ecodes.EV_ABS
+_ABS_HAT0X = ecodes.ABS_HAT0X
+# Presses of the same button closer than this are switch bounce
+BUTTON_DEBOUNCE_MS = 50
+# struct input_event: timeval (2 longs), type, code, value
+_EVENT_STRUCT = struct.Struct('llHHi')
+_READ_SIZE = _EVENT_STRUCT.size * 64
+# Deadzone bounds of the unmapped axes, out of reach of any event value
+_AXIS_MIN = -2**63
+_AXIS_MAX = 2**63 - 1
+
 
 class GamePads:
+    # ES input names -> actions passed to the listen() callback
+    _ACTIONS = {
+        "b": "activate",
+        "a": "back",
+        "up": "axis_up",
+        "down": "axis_down",
+        "left": "axis_left",
+        "right": "axis_right",
+        "joystick1up": "axis_up",
+        "joystick1down": "axis_down",
+        "joystick1left": "axis_left",
+        "joystick1right": "axis_right",
+        "joystick2up": "pan_up",
+        "joystick2down": "pan_down",
+        "joystick2left": "pan_left",
+        "joystick2right": "pan_right",
+        "pageup": "previous_tab",
+        "pagedown": "next_tab",
+    }
+
+    # Repeat interval (ms) of continuous actions
+    _CONTINUOUS_INTERVALS = {
+        "pan_up": 100, "pan_down": 100, "pan_left": 100, "pan_right": 100,  # Fast panning (10 times per second)
+        "axis_up": 200, "axis_down": 200,  # Medium zoom (5 times per second)
+        "axis_left": 300, "axis_right": 300,  # Slower page turning (3.3 times per second)
+    }
+
+    # SDL GUID: bus, vendor, product and version as little-endian 16-bit words,
+    # each followed by two zero bytes
+    _GUID_STRUCT = struct.Struct('<H2xH2xH2xH2x')
+
     def __init__(self):
         self._gamepad_devices = []
         self._gamepad_thread = None
         self._continuous_timers = {}  # Track multiple continuous actions
         self._continuous_callbacks = {}  # Track callbacks for each action
         self._continuous_actions_enabled = False  # Control when continuous actions are active
+        self._gamepad_running = False
+        self._gamepad_stop = None  # set by stopThread to interrupt the setup thread
+        self._monitor_source = None  # GLib source watching udev while listening
+        self._button_debouncer = Debouncer(BUTTON_DEBOUNCE_MS)
 
     def nb_devices(self):
         return len(self._gamepad_devices)
 
     @staticmethod
     def dev2int(dev: str) -> int | None:
-        matches = re.match(r"^/dev/input/event([0-9]*)$", dev) # limit events to the one of /dev/input/event* to avoid special things
-        if matches is None:
+        # limit events to the one of /dev/input/event* to avoid special things
+        if not dev.startswith("/dev/input/event"):
+            return None
+        number = dev[len("/dev/input/event"):]
+        if not (number.isascii() and number.isdigit()):
             return None
-        return int(matches.group(1))
+        return int(number)
 
     def open_devices(self):
         context = pyudev.Context()
-        for event in context.list_devices(subsystem='input'):
+        # let libudev do the joystick filtering; this still matches the parent
+        # input node and the legacy /dev/input/js* node, keep only evdev ones
+        for event in context.list_devices(subsystem='input', ID_INPUT_JOYSTICK='1'):
             try:
-                eventId = GamePads.dev2int(str(event.device_node))
-                if eventId is not None:
-                    isJoystick = ("ID_INPUT_JOYSTICK" in event.properties and event.properties["ID_INPUT_JOYSTICK"] == "1")
-                    if isJoystick:
-                        device = InputDevice(event.device_node)
-                        debug_print(f"[GAMEPAD] Found gamepad: {device.name} at {event.device_node}")
-                        self._gamepad_devices.append(device)
+                node = event.device_node
+                if node is not None and node.startswith("/dev/input/event"):
+                    device = InputDevice(node)
+                    debug_print(f"[GAMEPAD] Found gamepad: {device.name} at {node}")
+                    self._gamepad_devices.append(device)
             except Exception as e:
                 debug_print(f"[GAMEPAD] Error checking device {event}: {e}")
 
@@ -61,24 +115,38 @@ class GamePads:
             except Exception as e:
                 debug_print(f"[GAMEPAD] Could not grab {device.name}: {e}")
 
-    def _register_device(self, dev, pads_configs, mappings, axis_infos, axis_states):
-        """Compute and store the input mapping + axis calibration for one
-        device. Used both for devices found at startup and for ones
+    def _register_device(self, dev, pads_configs):
+        """Compute the input mapping + axis calibration for one device and
+        attach them to it (dev._button_lut, dev._hat_lut, dev._hat_release_lut,
+        dev._axis_lut, dev._codes, dev._axis_bornemin, dev._axis_bornemax,
+        dev._axis_state). Used both for devices found at startup and for ones
         hot-plugged later."""
         mapping = GamePads._find_best_controller_mapping(pads_configs, dev.name, dev.info.bustype, dev.info.vendor, dev.info.product, dev.info.version)
         if mapping is None:
             debug_print(f"[GAMEPAD] Warning: No mapping found for gamepad {dev.name}")
             mapping = {}  # Empty mapping to prevent errors
-        mappings[dev.fd] = mapping
-
-        axis_states[dev.fd] = {}
-        axis_infos[dev.fd] = {}
+        luts = self._build_action_luts(mapping)
+        dev._button_lut = luts["button"]
+        dev._hat_lut = luts["hat"]
+        dev._hat_release_lut = luts["hat_release"]
+        dev._axis_lut = luts["axis"]
+        # codes that can trigger an action: events for any other code
+        # (gyro/accel axes, unmapped buttons, ...) are dropped on arrival
+        dev._codes = {code for lut in (dev._button_lut, dev._hat_lut, dev._axis_lut) for code, _ in lut}
+
+        # Indexed by axis code (the ones below the hats): -1/0/1 state and
+        # deadzone bounds. Unmapped axes get bounds they can't leave.
+        dev._axis_state = array('b', bytes(_ABS_HAT0X))
+        dev._axis_bornemin = array('q', [_AXIS_MIN] * _ABS_HAT0X)
+        dev._axis_bornemax = array('q', [_AXIS_MAX] * _ABS_HAT0X)
 
         # get axis relaxed values for this specific device
         relaxValues = self.get_mapping_axis_relaxed_values(dev)
 
         if "axis" in mapping:
             for code in mapping["axis"]:
+                if code >= _ABS_HAT0X:
+                    continue  # handled as a hat
                 abs_info = dev.absinfo(code)
                 center = (abs_info.max + abs_info.min) // 2
                 if code in relaxValues and relaxValues[code]["centered"]:
@@ -90,7 +158,8 @@ class GamePads:
                     bornemin = abs_info.min -1 # can't reach it
                     bornemax = center
                     debug_print(f"[GAMEPAD] Axis {code} non-centered deadzone: {bornemin} to {bornemax} (center: {center}, range: {abs_info.min}-{abs_info.max})")
-                axis_infos[dev.fd][code] = { "bornemin": bornemin, "bornemax": bornemax }
+                dev._axis_bornemin[code] = bornemin
+                dev._axis_bornemax[code] = bornemax
 
                 # Initialize axis state properly using the same logic as event handling
                 current_value = abs_info.value
@@ -99,23 +168,49 @@ class GamePads:
                     initial_axis_value = -1
                 elif current_value > bornemax:
                     initial_axis_value = 1
-                axis_states[dev.fd][code] = initial_axis_value
+                dev._axis_state[code] = initial_axis_value
+
+    def _build_action_luts(self, mapping):
+        """Flatten an ES mapping into direct lookups for _handle_event:
+        (code, value) -> (action, continuous) for buttons, hats and axes,
+        plus code -> entries of all its directions for hat releases."""
+        luts = {"button": {}, "hat": {}, "hat_release": {}, "axis": {}}
+        for input_type in ("button", "hat", "axis"):
+            for code, values in mapping.get(input_type, {}).items():
+                for value, action_name in values.items():
+                    if action_name not in self._ACTIONS:
+                        continue
+                    entry = (self._ACTIONS[action_name], self._should_use_continuous_action(action_name))
+                    luts[input_type][(code, value)] = entry
+                    if input_type == "hat":
+                        luts["hat_release"].setdefault(code, []).append(entry)
+        return luts
+
+    def _watch_device(self, dev, f_handle_gamepad_action):
+        """Have the main loop read the device events as they arrive"""
+        dev._source_id = GLib.unix_fd_add_full(GLib.PRIORITY_DEFAULT, dev.fd, GLib.IOCondition.IN,
+                                               functools.partial(self._on_device_ready, dev, f_handle_gamepad_action))
 
-    def _remove_device(self, dev, mappings, axis_infos, axis_states):
-        """Drop a device that has been unplugged: release it and forget its
-        mapping/calibration state."""
+    @staticmethod
+    def _unwatch_device(dev):
+        source_id = getattr(dev, "_source_id", None)
+        if source_id is not None:
+            dev._source_id = None
+            GLib.source_remove(source_id)
+
+    def _remove_device(self, dev):
+        """Drop a device that has been unplugged: release it (its
+        mapping/calibration state goes away with it)."""
         if dev in self._gamepad_devices:
             self._gamepad_devices.remove(dev)
-        mappings.pop(dev.fd, None)
-        axis_infos.pop(dev.fd, None)
-        axis_states.pop(dev.fd, None)
+        self._unwatch_device(dev)
         try:
             dev.close()
         except Exception:
             pass
         debug_print(f"[GAMEPAD] Removed gamepad {dev.name}")
 
-    def _handle_hotplug_add(self, device_node, pads_configs, mappings, axis_infos, axis_states):
+    def _handle_hotplug_add(self, device_node, pads_configs, f_handle_gamepad_action):
         # udev can fire multiple add/change events for the same device node
         # during coldplug; ignore ones we're already tracking.
         if any(d.path == device_node for d in self._gamepad_devices):
@@ -130,13 +225,21 @@ class GamePads:
         except Exception as e:
             debug_print(f"[GAMEPAD] Hotplug: could not grab {dev.name}: {e}")
         self._gamepad_devices.append(dev)
-        self._register_device(dev, pads_configs, mappings, axis_infos, axis_states)
+        try:
+            self._register_device(dev, pads_configs)
+            self._watch_device(dev, f_handle_gamepad_action)
+        except Exception as e:
+            # Runs from a main loop callback: drop the pad rather than let
+            # the error escape and leave it grabbed but unwatched
+            debug_print(f"[GAMEPAD] Hotplug: could not set up {dev.name}: {e}")
+            self._remove_device(dev)
+            return
         debug_print(f"[GAMEPAD] Hotplug: added gamepad {dev.name} at {device_node}")
 
-    def _handle_hotplug_remove(self, device_node, mappings, axis_infos, axis_states):
+    def _handle_hotplug_remove(self, device_node):
         for dev in self._gamepad_devices:
             if dev.path == device_node:
-                self._remove_device(dev, mappings, axis_infos, axis_states)
+                self._remove_device(dev)
                 return
 
     def close_devices(self):
@@ -144,6 +247,7 @@ class GamePads:
         if not self._gamepad_devices:
             return
         for dev in self._gamepad_devices:
+            self._unwatch_device(dev)
             try:
                 dev.ungrab()
                 dev.close()
@@ -153,9 +257,11 @@ class GamePads:
         self._gamepad_devices = []
 
     def stop_listen(self):
-        # Signal the loop to stop, then close fds so a blocking select()
-        # wakes immediately (fd close raises OSError/ValueError out of select).
+        # Stop watching udev and the devices (main loop sources)
         self._gamepad_running = False
+        if self._monitor_source is not None:
+            GLib.source_remove(self._monitor_source)
+            self._monitor_source = None
         self._stop_all_continuous_actions()
         self.close_devices()
 
@@ -164,19 +270,10 @@ class GamePads:
         self._stop_continuous_action(action)  # Stop any existing action of this type
         
         # Send initial action immediately
-        GLib.idle_add(callback, action)
-        
-        # Determine interval based on action type
-        if action in ["pan_up", "pan_down", "pan_left", "pan_right"]:
-            interval = 100  # Fast panning (10 times per second)
-        elif action in ["axis_up", "axis_down"]:  # Zoom actions
-            interval = 200  # Medium zoom (5 times per second)
-        elif action in ["axis_left", "axis_right"]:  # Page turning
-            interval = 300  # Slower page turning (3.3 times per second)
-        else:
-            interval = 150  # Default interval
+        callback(action)
         
         # Start timer for continuous actions
+        interval = self._CONTINUOUS_INTERVALS.get(action, 150)  # 150ms by default
         timer_id = GLib.timeout_add(interval, self._continuous_action_tick, action, callback)
         self._continuous_timers[action] = timer_id
         self._continuous_callbacks[action] = callback
@@ -200,10 +297,11 @@ class GamePads:
 
     def _continuous_action_tick(self, action, callback):
         """Timer callback for continuous actions"""
-        if action in self._continuous_timers and callback:
-            GLib.idle_add(callback, action)
-            return True  # Continue timer
-        return False  # Stop timer
+        # Timeouts are dispatched on the main loop already: run the action
+        # right here. A busy main loop delays the next tick rather than
+        # queueing more of them.
+        callback(action)
+        return action in self._continuous_timers  # False stops the timer
 
     def _stop_continuous_action(self, action):
         """Stop continuous action for a specific action type"""
@@ -221,88 +319,128 @@ class GamePads:
         self._continuous_callbacks.clear()
 
     def startThread(self, handle_gamepad_action):
-        def evdev_loop():
+        # The thread only opens, calibrates and grabs the devices, which
+        # blocks for a while; their events are then read by the main loop
+        # itself (see listen), without any cross-thread hop.
+        self._gamepad_running = True
+        stop = self._gamepad_stop = threading.Event()
+
+        def evdev_setup():
             try:
                 self.open_devices()
                 if self.nb_devices() == 0:
                     debug_print("[GAMEPAD] No gamepad devices found via evdev at startup; watching for hot-plug")
-                # listen() also watches udev for hot-plug/unplug, so it's
-                # started even with zero devices at launch.
-                self.listen(handle_gamepad_action)
+
+                # get devices mappings + axis calibration for the devices found at startup
+                pads_configs = GamePads.load_es_dbpads()
+                for dev in self._gamepad_devices:
+                    self._register_device(dev, pads_configs)
+
+                # focus require that hotkeys down are received by underlaying apply
+                # to not cause issue (retroarch for example think that hotkey remains down, then right alone forwards)
+                # give hotkeygen time to process the hotkey release before bcc grabs device
+                # (stopThread interrupts the wait, so it doesn't block the UI)
+                if stop.wait(0.25):
+                    return
+
+                self._grab_devices()
             except Exception as e:
                 debug_print(f"[GAMEPAD] Evdev gamepad error: {e}")
-            finally:
                 self.close_devices()
-            debug_print("[GAMEPAD] end thread: evdev")
+                return
+            GLib.idle_add(self.listen, setup_thread, pads_configs, handle_gamepad_action)
+            debug_print("[GAMEPAD] end thread: evdev setup")
 
         # Store the thread so we can track it
-        self._gamepad_thread = threading.Thread(target=evdev_loop, daemon=True)
-        self._gamepad_thread.start()
+        setup_thread = threading.Thread(target=evdev_setup, daemon=True)
+        self._gamepad_thread = setup_thread
+        setup_thread.start()
 
     def stopThread(self):
-        self.stop_listen()
-        self._stop_all_continuous_actions()  # Stop any ongoing continuous actions
+        self._gamepad_running = False
+        if self._gamepad_stop is not None:
+            self._gamepad_stop.set()
+            self._gamepad_stop = None
         if self._gamepad_thread is not None:
             self._gamepad_thread.join()
             self._gamepad_thread = None
+        self.stop_listen()
 
     def get_mapping_axis_relaxed_values(self, device):
         """
         Axis released values
         To handle full axis (r2/l2 generally on some pads)
         """
-        import evdev
+        # full list of axis (in case one is not used in es), hats excepted
+        caps = device.capabilities()
+        codes = [code for code, _ in caps.get(ecodes.EV_ABS, ()) if code < ecodes.ABS_HAT0X]
+        if not codes:
+            return {}
 
         # read the sdl2 cache if possible for axis
         guid = GamePads.compute_guid(device.info.bustype, device.info.vendor, device.info.product, device.info.version)
         cache_file = Path(f"/userdata/system/.sdl2/{guid}_{device.name}.cache")
-        if not cache_file.exists():
+        try:
+            with cache_file.open(encoding="utf-8") as cache:
+                n = int(cache.readline()) # number of lines of the cache
+                relaxed_values = [int(cache.readline()) for _ in range(n)]
+        except FileNotFoundError:
             return {}
 
-        cache_content = cache_file.read_text(encoding="utf-8").splitlines()
-        n = int(cache_content[0]) # number of lines of the cache
-
-        relaxed_values: list[int] = [int(cache_content[i]) for i in range(1, n+1)]
-
-        # get full list of axis (in case one is not used in es)
-        caps = device.capabilities()
-        code_values: dict[int, int]  = {}
-        i = 0
-        for code, _ in caps[evdev.ecodes.EV_ABS]:
-            if code < evdev.ecodes.ABS_HAT0X:
-                code_values[code] = relaxed_values[i]
-                i = i+1
-
         # dict with es input names
-        res: dict[str, _RelaxedDict] = {}
-        for code, _ in caps[evdev.ecodes.EV_ABS]:
-            if code < evdev.ecodes.ABS_HAT0X:
-                # sdl values : from -32000 to 32000 / do not put < 0 cause a wheel/pad could be not correctly centered
-                # 3 possible initial positions <1----------------|-------2-------|----------------3>
-                val = code_values[code]
-                res[code] = { "centered":  val > -4000 and val < 4000, "reversed": val > 4000 }
+        res = {}
+        for code, val in zip(codes, relaxed_values):
+            # sdl values : from -32000 to 32000 / do not put < 0 cause a wheel/pad could be not correctly centered
+            # 3 possible initial positions <1----------------|-------2-------|----------------3>
+            res[code] = { "centered":  val > -4000 and val < 4000, "reversed": val > 4000 }
         return res
 
+    @staticmethod
+    @functools.lru_cache(maxsize=4)
+    def _load_es_input(path: str, mtime_ns: int):
+        """Parse an es_input.cfg and index its inputConfig entries by
+        (guid, name), by guid and by name, keeping the first one of each.
+        An entry is the tuple of the attributes of its <input> children.
+        Keyed by modification time, so an edited file is parsed again."""
+        by_guid_name = {}
+        by_guid = {}
+        by_name = {}
+        depth = 0
+        # Stream the file and free each inputConfig once its inputs are
+        # extracted, rather than keeping the whole tree
+        for event, element in ET.iterparse(path, events=("start", "end")):
+            if event == "start":
+                depth += 1
+                continue
+            depth -= 1
+            if depth != 1 or element.tag != "inputConfig":
+                continue
+            inputs = tuple(dict(child.attrib) for child in element if child.tag == "input")
+            guid = element.get("deviceGUID")
+            name = element.get("deviceName")
+            if guid is not None and name is not None:
+                by_guid_name.setdefault((guid, name), inputs)
+            if guid is not None:
+                by_guid.setdefault(guid, inputs)
+            if name is not None:
+                by_name.setdefault(name, inputs)
+            element.clear()
+        return by_guid_name, by_guid, by_name
+
     @staticmethod
     def load_es_dbpads():
         configs = []
         for conffile in [Path("/userdata/system/configs/emulationstation/es_input.cfg"), Path("/usr/share/emulationstation/es_input.cfg")]:
-            if conffile.exists():
-                configs.append(ET.parse(conffile).getroot())
+            try:
+                mtime_ns = conffile.stat().st_mtime_ns
+            except OSError:
+                continue
+            configs.append(GamePads._load_es_input(str(conffile), mtime_ns))
         return configs
 
     @staticmethod
     def compute_guid(bus, vendor, product, version):
-        x = ""
-        x += bus.to_bytes(2, byteorder='little').hex()
-        x += "0000"
-        x += vendor.to_bytes(2, byteorder='little').hex()
-        x += "0000"
-        x += product.to_bytes(2, byteorder='little').hex()
-        x += "0000"
-        x += version.to_bytes(2, byteorder='little').hex()
-        x += "0000"
-        return x
+        return GamePads._GUID_STRUCT.pack(bus, vendor, product, version).hex()
 
     @staticmethod
     def _find_best_controller_mapping(pads_configs, name, bus, vendor, product, version):
@@ -314,63 +452,60 @@ class GamePads:
 
         mappings = {}
         for input in input_config:
-            if input.tag == "input":
-                input_name  = input.get("name")
-                input_type  = input.get("type")
-                input_code  = input.get("code")
-                input_value = input.get("value")
-                # hat in es (and thus sdl) are axis starting à 16, 16/17 for hat0, 18/19 for hat1, and so on
-                if input_type == "hat":
-                    input_code  = 16+int(input.get("id"))
-                    if input_name == "up" or input_name == "down":
-                        input_code += 1
-                    if input_name == "up" or input_name == "left":
-                        input_value = -1
-                    else:
-                        input_value = 1
-                if input_name is not None and input_type is not None and input_code is not None and input_value is not None:
-                    input_code = int(input_code)
-                    input_value = int(input_value)
-                    if input_type not in mappings:
-                        mappings[input_type] = {}
-                    if input_code not in mappings[input_type]:
-                        mappings[input_type][input_code] = {}
-                    if input_value not in mappings[input_type][input_code]:
-                        mappings[input_type][input_code][input_value] = input_name
-                        if input_type == "axis":
-                            # es doesn't store all the axis sides
-                            if input_name == "joystick1left":
-                                mappings[input_type][input_code][-1*input_value] = "joystick1right"
-                            if input_name == "joystick1up":
-                                mappings[input_type][input_code][-1*input_value] = "joystick1down"
-                            if input_name == "joystick2left":
-                                mappings[input_type][input_code][-1*input_value] = "joystick2right"
-                            if input_name == "joystick2up":
-                                mappings[input_type][input_code][-1*input_value] = "joystick2down"
+            input_name  = input.get("name")
+            input_type  = input.get("type")
+            input_code  = input.get("code")
+            input_value = input.get("value")
+            # hat in es (and thus sdl) are axis starting à 16, 16/17 for hat0, 18/19 for hat1, and so on
+            if input_type == "hat":
+                input_code  = 16+int(input.get("id"))
+                if input_name == "up" or input_name == "down":
+                    input_code += 1
+                if input_name == "up" or input_name == "left":
+                    input_value = -1
+                else:
+                    input_value = 1
+            if input_name is not None and input_type is not None and input_code is not None and input_value is not None:
+                input_code = int(input_code)
+                input_value = int(input_value)
+                if input_type not in mappings:
+                    mappings[input_type] = {}
+                if input_code not in mappings[input_type]:
+                    mappings[input_type][input_code] = {}
+                if input_value not in mappings[input_type][input_code]:
+                    mappings[input_type][input_code][input_value] = input_name
+                    if input_type == "axis":
+                        # es doesn't store all the axis sides
+                        if input_name == "joystick1left":
+                            mappings[input_type][input_code][-1*input_value] = "joystick1right"
+                        if input_name == "joystick1up":
+                            mappings[input_type][input_code][-1*input_value] = "joystick1down"
+                        if input_name == "joystick2left":
+                            mappings[input_type][input_code][-1*input_value] = "joystick2right"
+                        if input_name == "joystick2up":
+                            mappings[input_type][input_code][-1*input_value] = "joystick2down"
         return mappings
 
     @staticmethod
     def _find_input_config(pads_configs, name: str, guid: str):
-        path = './inputConfig'
-
-        for pads_config in pads_configs:
-            element = pads_config.find(f'{path}[@deviceGUID="{guid}"][@deviceName="{name}"]')
+        for by_guid_name, _, _ in pads_configs:
+            element = by_guid_name.get((guid, name))
             if element is not None:
                 return element
 
-        for pads_config in pads_configs:
-            element = pads_config.find(f'{path}[@deviceGUID="{guid}"]')
+        for _, by_guid, _ in pads_configs:
+            element = by_guid.get(guid)
             if element is not None:
                 return element
 
-        for pads_config in pads_configs:
-            element = pads_config.find(f'{path}[@deviceName="{name}"]')
+        for _, _, by_name in pads_configs:
+            element = by_name.get(name)
             if element is not None:
                 return element
-   
+
         return None
 
-    def listen(self, f_handle_gamepad_action):
+    def listen(self, setup_thread, pads_configs, f_handle_gamepad_action):
         """ where f_handle_gamepad_action is a function that takes 1 argument that can take the values:
         "activate"
         "back"
@@ -378,190 +513,132 @@ class GamePads:
         "axis_down"
         "axis_left"
         "axis_right"
+        Runs on the main loop once setup_thread has grabbed the devices: from
+        then on the main loop wakes up only when the udev monitor or a device
+        has something to read, and f_handle_gamepad_action is called from there.
         """
-        
-        import select
-        import time
-
-        # actions
-        actions = {
-            "b": "activate",
-            "a": "back",
-            "up": "axis_up",
-            "down": "axis_down",
-            "left": "axis_left",
-            "right": "axis_right",
-            "joystick1up": "axis_up",
-            "joystick1down": "axis_down",
-            "joystick1left": "axis_left",
-            "joystick1right": "axis_right",
-            "joystick2up": "pan_up",
-            "joystick2down": "pan_down",
-            "joystick2left": "pan_left",
-            "joystick2right": "pan_right",
-            "pageup": "previous_tab",
-            "pagedown": "next_tab",
-        }
-
-        # get devices mappings + axis calibration for the devices found at startup
-        pads_configs = GamePads.load_es_dbpads()
-        mappings = {}
-        axis_states = {}
-        axis_infos  = {}
-        for dev in self._gamepad_devices:
-            self._register_device(dev, pads_configs, mappings, axis_infos, axis_states)
+        if setup_thread is not self._gamepad_thread or not self._gamepad_running:
+            return False  # stopped (or restarted) while the devices were set up
 
-        # focus require that hotkeys down are received by underlaying apply
-        # to not cause issue (retroarch for example think that hotkey remains down, then right alone forwards)
-        # give hotkeygen time to process the hotkey release before bcc grabs device
-        time.sleep(0.25)
+        # Watch udev for gamepad hot-plug/unplug so a controller connected
+        # (or disconnected) after startup doesn't require restarting the app,
+        # also with zero devices at launch. The monitor is only created once
+        # the listening is sure to start: it lives as long as its source
+        try:
+            monitor = pyudev.Monitor.from_netlink(pyudev.Context())
+            monitor.filter_by(subsystem='input')
+            monitor.start()
+            self._monitor_source = GLib.unix_fd_add_full(GLib.PRIORITY_DEFAULT, monitor.fileno(), GLib.IOCondition.IN,
+                                                         functools.partial(self._on_monitor_ready, monitor, pads_configs, f_handle_gamepad_action))
+        except Exception as e:
+            debug_print(f"[GAMEPAD] Cannot watch gamepad hot-plug: {e}")
+        for dev in self._gamepad_devices:
+            self._watch_device(dev, f_handle_gamepad_action)
+        return False
+
+    def _on_monitor_ready(self, monitor, pads_configs, f_handle_gamepad_action, fd, condition):
+        # Drain all pending udev events non-blockingly.
+        for udev_dev in iter(lambda: monitor.poll(0), None):
+            node = udev_dev.device_node
+            if GamePads.dev2int(str(node)) is None:
+                continue
+            if udev_dev.action == 'add':
+                is_joystick = udev_dev.properties.get("ID_INPUT_JOYSTICK") == "1"
+                if is_joystick:
+                    self._handle_hotplug_add(node, pads_configs, f_handle_gamepad_action)
+            elif udev_dev.action == 'remove':
+                self._handle_hotplug_remove(node)
+        return True
+
+    def _on_device_ready(self, device, f_handle_gamepad_action, fd, condition):
+        try:
+            # Decode the raw input_events in one go (no InputEvent object
+            # per event). A read returns at most one buffer of events: drain
+            # the fd until it would block, so a burst from a chatty pad
+            # isn't left behind until the next wake
+            while True:
+                for _, _, etype, code, value in _EVENT_STRUCT.iter_unpack(os.read(fd, _READ_SIZE)):
+                    self._handle_event(device, etype, code, value, f_handle_gamepad_action)
+                    if device._source_id is None:
+                        return False  # released by the action (window hidden, ...)
+        except BlockingIOError:
+            pass
+        except OSError as e:
+            # Device most likely unplugged; the udev 'remove' event
+            # for it may not have been processed yet. Drop it now
+            # so the main loop doesn't spin on a dead fd.
+            debug_print(f"[GAMEPAD] Device read error, dropping {getattr(device, 'name', device)}: {e}")
+            self._remove_device(device)
+            return False
+        except Exception as e:
+            debug_print(f"[GAMEPAD] Error reading event: {e}")
+        return True
+
+    def _start_action(self, entry, f_handle_gamepad_action):
+        action, continuous = entry
+        # Use continuous actions only when enabled (document viewer)
+        if continuous and self._continuous_actions_enabled:
+            self._start_continuous_action(action, f_handle_gamepad_action)
+        else:
+            # Single action for main window navigation or when continuous actions disabled
+            f_handle_gamepad_action(action)
 
-        self._grab_devices()
-        self._gamepad_running = True
+    def _stop_action(self, entry):
+        action, continuous = entry
+        if continuous and self._continuous_actions_enabled:
+            self._stop_continuous_action(action)
 
-        # Watch udev for gamepad hot-plug/unplug so a controller connected
-        # (or disconnected) after startup doesn't require restarting the app.
-        monitor = pyudev.Monitor.from_netlink(pyudev.Context())
-        monitor.filter_by(subsystem='input')
-        monitor.start()
-
-        while self._gamepad_running:
-            # 1s timeout (was 0.1s polling) cuts idle wakeups 10/s -> 1/s.
-            # Shutdown is immediate: stop_listen() closes the fds, raising
-            # OSError/ValueError out of select. Note self._gamepad_devices
-            # may be empty (no controller yet) - we still select on the
-            # udev monitor so a later hot-plug is picked up.
-            try:
-                r, w, x = select.select(self._gamepad_devices + [monitor], [], [], 1.0)
-            except (OSError, ValueError):
-                # File descriptor closed during select (shutdown)
-                break
-
-            for device in r:
-                if device is monitor:
-                    # Drain all pending udev events non-blockingly.
-                    for udev_dev in iter(lambda: monitor.poll(0), None):
-                        node = udev_dev.device_node
-                        if GamePads.dev2int(str(node)) is None:
-                            continue
-                        if udev_dev.action == 'add':
-                            is_joystick = udev_dev.properties.get("ID_INPUT_JOYSTICK") == "1"
-                            if is_joystick:
-                                self._handle_hotplug_add(node, pads_configs, mappings, axis_infos, axis_states)
-                        elif udev_dev.action == 'remove':
-                            self._handle_hotplug_remove(node, mappings, axis_infos, axis_states)
-                    continue
-
-                try:
-                    for event in device.read():
-                        self._handle_event(device, event, mappings.get(device.fd, {}), axis_infos, axis_states, actions, f_handle_gamepad_action)
-
-                except OSError as e:
-                    # Device most likely unplugged; the udev 'remove' event
-                    # for it may not have been processed yet. Drop it now
-                    # so select() doesn't spin on a dead fd.
-                    debug_print(f"[GAMEPAD] Device read error, dropping {getattr(device, 'name', device)}: {e}")
-                    self._remove_device(device, mappings, axis_infos, axis_states)
-                except Exception as e:
-                    debug_print(f"[GAMEPAD] Error reading event: {e}")
-
-    def _handle_event(self, device, event, mapping, axis_infos, axis_states, actions, f_handle_gamepad_action):
-        # Safety check - ensure mapping exists
-        if not mapping:
+    def _handle_event(self, device, etype, code, value, f_handle_gamepad_action):
+        if code not in device._codes:
             return
-            
-        if event.type == ecodes.EV_KEY:
-            if event.value != 0:  # Button down
-                if "button" in mapping and event.code in mapping["button"] and event.value in mapping["button"][event.code]:
-                    if mapping["button"][event.code][event.value] in actions:
-                        GLib.idle_add(f_handle_gamepad_action, actions[mapping["button"][event.code][event.value]])
-        elif event.type == ecodes.EV_ABS:
-            if event.code >= 16 and event.value != 0: # hat down
-                if "hat" in mapping and event.code in mapping["hat"] and event.value in mapping["hat"][event.code]:
-                    if mapping["hat"][event.code][event.value] in actions:
-                        action_name = mapping["hat"][event.code][event.value]
-                        action = actions[action_name]
-                        # Use continuous actions only when enabled (document viewer)
-                        if self._continuous_actions_enabled and self._should_use_continuous_action(action_name):
-                            self._start_continuous_action(action, f_handle_gamepad_action)
-                        else:
-                            # Single action for main window navigation or when continuous actions disabled
-                            GLib.idle_add(f_handle_gamepad_action, action)
-            elif event.code >= 16 and event.value == 0: # hat released
-                if "hat" in mapping and event.code in mapping["hat"]:
-                    # Stop continuous actions for this hat only when continuous actions are enabled
-                    if self._continuous_actions_enabled:
-                        for hat_value in mapping["hat"][event.code]:
-                            action_name = mapping["hat"][event.code][hat_value]
-                            if action_name in actions and self._should_use_continuous_action(action_name):
-                                action = actions[action_name]
-                                self._stop_continuous_action(action)
+
+        if etype == _EV_KEY:
+            if value != 0:  # Button down
+                entry = device._button_lut.get((code, value))
+                if entry is not None and self._button_debouncer.allow(f"{device.path}:{code}"):
+                    f_handle_gamepad_action(entry[0])
+        elif etype == _EV_ABS:
+            if code >= _ABS_HAT0X and value != 0: # hat down
+                entry = device._hat_lut.get((code, value))
+                if entry is not None:
+                    self._start_action(entry, f_handle_gamepad_action)
+            elif code >= _ABS_HAT0X: # hat released
+                # Stop continuous actions for this hat
+                for entry in device._hat_release_lut.get(code, ()):
+                    self._stop_action(entry)
             else:
-                # axis - simplified logic similar to original
-                if "axis" in mapping and event.code in mapping["axis"]:
-                    # Check if we have the required data structures
-                    if (device.fd in axis_states and event.code in axis_states[device.fd] and
-                        device.fd in axis_infos and event.code in axis_infos[device.fd]):
-                        
-                        old_axis_value = axis_states[device.fd][event.code]
-                        axis_value = 0
-                        
-                        # Determine new axis state with proper deadzone logic
-                        if event.value < axis_infos[device.fd][event.code]["bornemin"]:
-                            axis_value = -1
-                        elif event.value > axis_infos[device.fd][event.code]["bornemax"]:
-                            axis_value = 1
-                        else:
-                            axis_value = 0  # Within deadzone
-                        
-                        # Debug output for PS3 controller troubleshooting
-                        if axis_value != old_axis_value:
-                            debug_print(f"[GAMEPAD] Axis {event.code} changed from {old_axis_value} to {axis_value} ({event.value} in range {axis_infos[device.fd][event.code]['bornemin']} to {axis_infos[device.fd][event.code]['bornemax']})")
-                        
-                        # Update axis state
-                        axis_states[device.fd][event.code] = axis_value
-                        
-                        # Handle axis activation (going from neutral to active)
-                        if axis_value != 0 and old_axis_value == 0:
-                            if axis_value in mapping["axis"][event.code]:
-                                action_name = mapping["axis"][event.code][axis_value]
-                                if action_name in actions:
-                                    action = actions[action_name]
-                                    
-                                    # Use continuous or single action based on context
-                                    if self._continuous_actions_enabled and self._should_use_continuous_action(action_name):
-                                        self._start_continuous_action(action, f_handle_gamepad_action)
-                                    else:
-                                        GLib.idle_add(f_handle_gamepad_action, action)
-                        
-                        # Handle axis release (going from active to neutral)
-                        elif axis_value == 0 and old_axis_value != 0:
-                            if old_axis_value in mapping["axis"][event.code]:
-                                action_name = mapping["axis"][event.code][old_axis_value]
-                                if action_name in actions:
-                                    action = actions[action_name]
-                                    
-                                    # Stop continuous action if it was running
-                                    if self._continuous_actions_enabled and self._should_use_continuous_action(action_name):
-                                        self._stop_continuous_action(action)
-                        
-                        # Handle axis direction change (from one direction to another)
-                        elif axis_value != 0 and old_axis_value != 0 and axis_value != old_axis_value:
-                            # Stop old action
-                            if old_axis_value in mapping["axis"][event.code]:
-                                old_action_name = mapping["axis"][event.code][old_axis_value]
-                                if old_action_name in actions:
-                                    old_action = actions[old_action_name]
-                                    if self._continuous_actions_enabled and self._should_use_continuous_action(old_action_name):
-                                        self._stop_continuous_action(old_action)
-                            
-                            # Start new action
-                            if axis_value in mapping["axis"][event.code]:
-                                action_name = mapping["axis"][event.code][axis_value]
-                                if action_name in actions:
-                                    action = actions[action_name]
-                                    
-                                    if self._continuous_actions_enabled and self._should_use_continuous_action(action_name):
-                                        self._start_continuous_action(action, f_handle_gamepad_action)
-                                    else:
-                                        GLib.idle_add(f_handle_gamepad_action, action)
+                # axis - the ones without a mapping always stay in the deadzone
+                bornemin = device._axis_bornemin[code]
+                bornemax = device._axis_bornemax[code]
+                old_axis_value = device._axis_state[code]
+
+                # Determine new axis state with proper deadzone logic
+                if value < bornemin:
+                    axis_value = -1
+                elif value > bornemax:
+                    axis_value = 1
+                else:
+                    axis_value = 0  # Within deadzone
+
+                if axis_value == old_axis_value:
+                    return
+
+                # Debug output for PS3 controller troubleshooting
+                if DEBUG:
+                    debug_print(f"[GAMEPAD] Axis {code} changed from {old_axis_value} to {axis_value} ({value} in range {bornemin} to {bornemax})")
+
+                # Update axis state
+                device._axis_state[code] = axis_value
+
+                # Leaving a direction (release, or change to the opposite one):
+                # stop its continuous action if it was running
+                if old_axis_value != 0:
+                    entry = device._axis_lut.get((code, old_axis_value))
+                    if entry is not None:
+                        self._stop_action(entry)
+
+                # Entering a direction (from neutral or from the opposite one)
+                if axis_value != 0:
+                    entry = device._axis_lut.get((code, axis_value))
+                    if entry is not None:
+                        self._start_action(entry, f_handle_gamepad_action)
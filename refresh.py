@@ -16,8 +16,8 @@ DEFAULT_REFRESH_SEC = 0  # no refresh by default (set refresh="1.0" on elements
 
 # Shared pool of persistent daemon workers for RefreshTask ticks and one-shot
 # off-main-thread actions. Workers block on the queue (idle pool costs nothing).
-# Queue items: ("__call__", fn) runs fn(); (cmd, callback) runs
-# run_shell_capture_cached(cmd) then idle_add(callback, result).
+# Queue items: ("__call__", fn) runs fn(); (cmd, callback, ttl_sec) runs
+# run_shell_capture_cached(cmd, ttl_sec) then idle_add(callback, result).
 _WORKER_COUNT = 4
 _work_queue: "queue.Queue[tuple]" = queue.Queue()
 
@@ -25,12 +25,12 @@ def _worker_loop():
     while True:
         item = _work_queue.get()
         try:
-            if len(item) == 2 and item[0] == "__call__":
+            if item[0] == "__call__":
                 _, fn = item
                 fn()
             else:
-                cmd, callback = item
-                result = run_shell_capture_cached(cmd)
+                cmd, callback, ttl_sec = item
+                result = run_shell_capture_cached(cmd, ttl_sec=ttl_sec)
                 GLib.idle_add(callback, result)
         except Exception:
             pass
@@ -54,6 +54,10 @@ class RefreshTask:
         self.widget_update_fn = widget_update_fn
         self.cmd = cmd
         self.interval_ms = max(250, int(interval_sec * 1000))
+        # A result younger than half a period is shared with the other tasks
+        # polling the same command; older ones are re-run, so every tick
+        # still shows a value at most that old
+        self.ttl_sec = self.interval_ms / 2000.0
         self._timer_id = None
         self._active = False
 
@@ -71,7 +75,7 @@ class RefreshTask:
         self._timer_id = GLib.timeout_add(delay, self._tick)
 
     def _tick(self):
-        _work_queue.put((self.cmd, self.widget_update_fn))
+        _work_queue.put((self.cmd, self.widget_update_fn, self.ttl_sec))
         if self._active:
             self._schedule_tick(immediate=False)
         return False
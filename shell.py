@@ -92,14 +92,14 @@ def run_shell_capture(cmd: str, timeout_sec: float = 3.0) -> str:
                 shell=True,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.DEVNULL,
-                preexec_fn=os.setsid,
+                start_new_session=True,
             )
         else:
             proc = subprocess.Popen(
                 shlex.split(cmd),
                 stdout=subprocess.PIPE,
                 stderr=subprocess.DEVNULL,
-                preexec_fn=os.setsid,
+                start_new_session=True,
             )
         out, _ = proc.communicate(timeout=timeout_sec)
         return out.decode("utf-8", errors="ignore").strip()
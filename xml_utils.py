@@ -7,7 +7,7 @@
 # as published by the Free Software Foundation, version 3.
 #
 # YOU MUST KEEP THIS HEADER AS IT IS
-import xml.etree.ElementTree as ET
+from xml.parsers import expat
 
 class CCElement:
     def __init__(self, kind: str, attrs: dict, children: list, line: int = -1):
@@ -16,20 +16,26 @@ class CCElement:
         self.children = children
         self.line = line
 
-def _get_line(elem: ET.Element) -> int:
-    return getattr(elem, 'sourceline', -1)
-
 def parse_xml(path: str) -> CCElement:
-    parser = ET.XMLParser()
-    tree = ET.parse(path, parser=parser)
-    root = tree.getroot()
+    # Build the CCElement tree straight from the expat callbacks, in one pass
+    # and without an intermediate ElementTree (which has no line numbers)
+    parser = expat.ParserCreate()
+    stack: list[CCElement] = []
+    roots: list[CCElement] = []
+
+    def start_element(tag: str, attrs: dict):
+        node = CCElement(tag, attrs, [], line=parser.CurrentLineNumber)
+        (stack[-1].children if stack else roots).append(node)
+        stack.append(node)
 
-    def parse_node(node: ET.Element) -> CCElement:
-        attrs = {k: v for k, v in node.attrib.items()}
-        children = [parse_node(c) for c in list(node)]
-        return CCElement(node.tag, attrs, children, line=_get_line(node))
+    def end_element(tag: str):
+        stack.pop()
 
-    return parse_node(root)
+    parser.StartElementHandler = start_element
+    parser.EndElementHandler = end_element
+    with open(path, 'rb') as f:
+        parser.ParseFile(f)
+    return roots[0]
 
 def validate_xml(root: CCElement) -> tuple[list[str], list[str]]:
     errors: list[str] = []